@@ -4,11 +4,12 @@ Certbot authentication hook for DNS-01 challenge with DNS Exit.
 This script is called by certbot to add the TXT record for DNS-01 validation.
 """
 
+import hashlib
 import os
 import sys
 import time
 
-from .dnsexit_client import DNSExitClient, configure_logger
+from .dnsexit_client import DNSExitClient, configure_logger, locked_json_state, state_file_path, zone_for_domain
 from .logging_config import log_component_error, log_dns_operation, setup_logger
 
 # Configure logging with environment variable support
@@ -18,6 +19,83 @@ logger = setup_logger(__name__)
 current_log_level = os.environ.get("LOG_LEVEL", "NOT_SET")
 logger.debug(f"Current LOG_LEVEL environment variable: {current_log_level}")
 
+# Environment variables every hook invocation needs
+REQUIRED_ENV_VARS = ("CERTBOT_DOMAIN", "CERTBOT_VALIDATION", "DNSEXIT_API_KEY")
+
+# Queued records older than this belong to an aborted certbot run
+PENDING_RECORDS_MAX_AGE = 600
+
+
+def queue_challenge_record(domain: str, txt_name: str, validation: str) -> list[tuple[str, str, str]] | None:
+    """
+    Queue a challenge record until the last auth hook invocation of a certbot run.
+
+    Certbot runs the auth hook once per challenge and only asks the CA to validate
+    after every hook returned, so records can be deferred and created together.
+    The first challenge of a run starts a fresh queue, so records left behind by an
+    aborted run never get created with this one.
+
+    Args:
+        domain: Domain being validated
+        txt_name: TXT record name
+        validation: TXT record value
+
+    Returns:
+        None if the record was deferred; otherwise the (domain, name, value) records
+        to create now: all queued records on the last challenge, or only this one
+        when certbot does not provide CERTBOT_ALL_DOMAINS/CERTBOT_REMAINING_CHALLENGES
+    """
+    all_domains = os.environ.get("CERTBOT_ALL_DOMAINS")
+    try:
+        remaining = int(os.environ.get("CERTBOT_REMAINING_CHALLENGES", ""))
+    except ValueError:
+        remaining = None
+    if not all_domains or remaining is None:
+        return [(domain, txt_name, validation)]
+
+    run_key = hashlib.sha256(all_domains.encode("utf-8")).hexdigest()[:16]
+    # CERTBOT_REMAINING_CHALLENGES counts down from one less than the number of domains
+    first_challenge = remaining == len(all_domains.split(",")) - 1
+    now = time.time()
+    try:
+        with locked_json_state(state_file_path(f"dnsexit-pending-{run_key}.json")) as state:
+            records = [
+                record
+                for record in ([] if first_challenge else state.get("records", []))
+                if isinstance(record, list) and len(record) == 4 and now - record[3] < PENDING_RECORDS_MAX_AGE
+            ]
+            records.append([domain, txt_name, validation, now])
+            if remaining > 0:
+                state["records"] = records
+                return None
+            state.clear()
+    except OSError as e:
+        logger.warning(f"Pending record queue unavailable, creating record immediately: {e}")
+        return [(domain, txt_name, validation)]
+
+    return [(d, n, v) for d, n, v, _ in records]
+
+
+def group_records_by_zone(records: list[tuple[str, str, str]]) -> dict[str, tuple[list[str], list[str]]]:
+    """
+    Group challenge records so each zone is updated with a single API call.
+
+    A record is attached to the DNS zone of its domain, so www.example.com and
+    api.example.com are created together even without example.com itself.
+
+    Args:
+        records: (domain, name, value) records
+
+    Returns:
+        Mapping of API domain (zone) to (names, values)
+    """
+    batches: dict[str, tuple[list[str], list[str]]] = {}
+    for domain, name, value in records:
+        names, values = batches.setdefault(zone_for_domain(domain), ([], []))
+        names.append(name)
+        values.append(value)
+    return batches
+
 
 def main():
     """
@@ -34,23 +112,13 @@ def main():
         configure_logger(logger)
 
         # Validate required environment variables
-        domain = os.environ.get("CERTBOT_DOMAIN")
-        validation = os.environ.get("CERTBOT_VALIDATION")
-        api_key = os.environ.get("DNSEXIT_API_KEY")
-
-        if not all([domain, validation, api_key]):
-            missing = []
-            if not domain:
-                missing.append("CERTBOT_DOMAIN")
-            if not validation:
-                missing.append("CERTBOT_VALIDATION")
-            if not api_key:
-                missing.append("DNSEXIT_API_KEY")
+        env = {name: os.environ.get(name) for name in REQUIRED_ENV_VARS}
+        if missing := [name for name, env_value in env.items() if not env_value]:
             logger.error(f"Missing required environment variables: {', '.join(missing)}")
             return 1
-
-        # Initialize DNS Exit client
-        client = DNSExitClient(api_key)
+        domain = env["CERTBOT_DOMAIN"]
+        validation = env["CERTBOT_VALIDATION"]
+        api_key = env["DNSEXIT_API_KEY"]
 
         # For DNS-01 challenge, the TXT record name is always _acme-challenge.{domain}
         # where domain is the fully qualified domain name being validated
@@ -59,11 +127,25 @@ def main():
         log_dns_operation(logger, "challenge start", domain, "creating TXT record")
         # Note: Not logging validation value for security reasons
 
-        # Add the TXT record
-        if not client.add_txt_record(domain, txt_name, validation):
-            log_component_error(logger, "auth_hook", f"Failed to add TXT record for {domain}")
-            return 1
-        log_dns_operation(logger, "record added", domain, "success")
+        records = queue_challenge_record(domain, txt_name, validation)
+        if records is None:
+            log_dns_operation(logger, "record deferred", domain, "will be created with the last challenge")
+            return 0
+
+        # Initialize DNS Exit client only in the invocation that talks to the API
+        client = DNSExitClient(api_key)
+
+        # Add the TXT record(s), one API call per zone
+        batches = group_records_by_zone(records)
+        for zone, (names, values) in batches.items():
+            if len(names) == 1:
+                added = client.add_txt_record(zone, names[0], values[0])
+            else:
+                added = client.add_txt_record(zone, names, values)
+            if not added:
+                log_component_error(logger, "auth_hook", f"Failed to add TXT record for {zone}")
+                return 1
+            log_dns_operation(logger, "record added", zone, "success" if len(names) == 1 else f"{len(names)} records")
 
         # Get DNS propagation wait time from environment variable
         dns_propagation_wait = int(os.environ.get("DNS_PROPAGATION_WAIT", "300"))
@@ -76,29 +158,32 @@ def main():
         # Get DNS Exit DNS server from environment variable
         dns_server = os.environ.get("DNS_PROPAGATION_ADDRESS", "ns12.dnsexit.com")
 
-        # Use the unified function for periodic propagation checking with retries
-        propagation_result = client.wait_for_propagation(
-            domain,
-            txt_name,
-            validation,
-            timeout=dns_propagation_wait,
-            dns_server=dns_server,
-            retry_on_failure=True,
-            check_interval=dns_propagation_check_interval,
-        )
-
-        if propagation_result:
-            log_dns_operation(logger, "propagation", domain, "completed successfully")
-
-            # Additional pause for complete DNS synchronization across all servers
-            # This helps prevent Let's Encrypt secondary validation failures
-            dns_finalization_wait = int(os.environ.get("DNS_FINALIZATION_WAIT", "5"))  # 5 seconds default
-            logger.info(f"Waiting additional {dns_finalization_wait}s for complete DNS synchronization...")
-            time.sleep(dns_finalization_wait)
-
-            return 0
-        log_component_error(logger, "auth_hook", f"DNS record did not propagate within timeout for {domain}")
-        return 1
+        # Use the unified function for periodic propagation checking with retries;
+        # retries re-add each record under the zone it was created in
+        for zone, (names, values) in batches.items():
+            for record_name, record_value in zip(names, values, strict=True):
+                if not client.wait_for_propagation(
+                    zone,
+                    record_name,
+                    record_value,
+                    timeout=dns_propagation_wait,
+                    dns_server=dns_server,
+                    retry_on_failure=True,
+                    check_interval=dns_propagation_check_interval,
+                ):
+                    log_component_error(
+                        logger, "auth_hook", f"DNS record did not propagate within timeout for {record_name}"
+                    )
+                    return 1
+                log_dns_operation(logger, "propagation", record_name, "completed successfully")
+
+        # Additional pause for complete DNS synchronization across all servers
+        # This helps prevent Let's Encrypt secondary validation failures
+        dns_finalization_wait = int(os.environ.get("DNS_FINALIZATION_WAIT", "5"))  # 5 seconds default
+        logger.info(f"Waiting additional {dns_finalization_wait}s for complete DNS synchronization...")
+        time.sleep(dns_finalization_wait)
+
+        return 0
 
     except Exception as e:
         logger.exception(f"Error in auth hook: {e}")
@@ -13,13 +13,17 @@ from logging_config import setup_logger
 logger = setup_logger(__name__)
 
 # Import DNSExit client and config loader after logger setup
-from dnsexit_client import DNSExitClient, configure_logger
+from dnsexit_client import DNSExitClient, configure_logger, zone_for_domain
 
 # Debug: Log the current LOG_LEVEL
 current_log_level = os.environ.get("LOG_LEVEL", "NOT_SET")
 logger.debug(f"Current LOG_LEVEL environment variable: {current_log_level}")
 
 
+# Environment variables every hook invocation needs
+REQUIRED_ENV_VARS = ("CERTBOT_DOMAIN", "CERTBOT_VALIDATION", "DNSEXIT_API_KEY")
+
+
 def main():
     """
     Main entry point for the cleanup hook.
@@ -35,20 +39,13 @@ def main():
         configure_logger(logger)
 
         # Validate required environment variables
-        domain = os.environ.get("CERTBOT_DOMAIN")
-        validation = os.environ.get("CERTBOT_VALIDATION")
-        api_key = os.environ.get("DNSEXIT_API_KEY")
-
-        if not all([domain, validation, api_key]):
-            missing = []
-            if not domain:
-                missing.append("CERTBOT_DOMAIN")
-            if not validation:
-                missing.append("CERTBOT_VALIDATION")
-            if not api_key:
-                missing.append("DNSEXIT_API_KEY")
+        env = {name: os.environ.get(name) for name in REQUIRED_ENV_VARS}
+        if missing := [name for name, env_value in env.items() if not env_value]:
             logger.error(f"Missing required environment variables: {', '.join(missing)}")
             return 1
+        # CERTBOT_VALIDATION is only checked: records are deleted by name
+        domain = env["CERTBOT_DOMAIN"]
+        api_key = env["DNSEXIT_API_KEY"]
 
         # Initialize DNS Exit client
         client = DNSExitClient(api_key)
@@ -61,8 +58,8 @@ def main():
         logger.info(f"TXT record name: {txt_name}")
         # Note: Not logging validation value for security reasons
 
-        # Remove the TXT record
-        if not client.remove_txt_record(domain, txt_name, validation):
+        # Remove the TXT record from the zone the auth hook created it in
+        if not client.remove_txt_record(zone_for_domain(domain), txt_name):
             logger.warning("Failed to remove TXT record (continuing cleanup)")
 
         logger.info("DNS record cleanup completed")
@@ -5,28 +5,61 @@ DNS Exit API client for managing DNS records.
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import fcntl
+import functools
 import json
 import logging
+import os
+import re
+import socket
+import stat
+import tempfile
 import time
+from collections.abc import Mapping
 from typing import TYPE_CHECKING, Any, TypedDict
 
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from .logging_config import dumps_json
+except ImportError:  # loaded as a top-level module by cleanup_hook
+    from logging_config import dumps_json  # type: ignore[no-redef]
 
 if TYPE_CHECKING:
-    import dns
+    from collections.abc import Iterator
 
 # Get module logger
 logger = logging.getLogger(__name__)
 
 
+class _MainLoggerForwarder(logging.Handler):
+    """Hand client log records to the main logger, whatever handlers it currently has."""
+
+    def __init__(self, target: logging.Logger):
+        super().__init__()
+        self.target = target
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.target.handle(record)
+
+
 def configure_logger(main_logger=None):
     """Configure the DNSExit client logger to match main logger configuration."""
     if main_logger is not None:
         # Copy level from main logger
         logger.setLevel(main_logger.level)
-        # Copy handlers from main logger
-        for handler in main_logger.handlers:
-            logger.addHandler(handler)
+        # Forward to the main logger instead of copying its handlers: reconfiguring it
+        # replaces them and stops the queue listener a copied queue handler feeds
+        for handler in [h for h in logger.handlers if isinstance(h, _MainLoggerForwarder)]:
+            logger.removeHandler(handler)
+        logger.addHandler(_MainLoggerForwarder(main_logger))
     # If no main logger specified, let it inherit from parent
 
 
@@ -34,8 +67,15 @@ def configure_logger(main_logger=None):
 DEFAULT_BASE_URL = "https://api.dnsexit.com/dns/"
 DEFAULT_USER_AGENT = "Certbot-DNSExit/1.0"
 REQUEST_TIMEOUT = (30, 30)  # (connect_timeout, read_timeout)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
 RESOLVER_TIMEOUT = 5
-MIN_PROPAGATION_INTERVAL = 5
+# Dict keys whose values are masked in debug output
+SENSITIVE_KEY_RE = re.compile(r"key|secret|password|token|auth", re.IGNORECASE)
+EDNS_PAYLOAD_SIZE = 4096  # large enough for several TXT values without UDP truncation
+MIN_PROPAGATION_INTERVAL = 1  # first re-check delay; doubles up to check_interval
+NAMESERVER_CACHE_TTL = 300  # seconds a resolved DNS server address is shared with other hook runs
+# Private directory (mode 0700) for state shared between concurrent hook processes
+STATE_DIR = os.environ.get("DNSEXIT_STATE_DIR", os.path.join(tempfile.gettempdir(), f"dnsexit-{os.geteuid()}"))
 
 
 class DNSExitResponse(TypedDict, total=False):
@@ -44,6 +84,128 @@ class DNSExitResponse(TypedDict, total=False):
     data: dict[str, Any]
 
 
+@contextlib.contextmanager
+def locked_json_state(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Open a JSON state file under an exclusive lock and yield its contents.
+
+    Changes made to the yielded dict are written back before the lock is released.
+
+    Args:
+        path: State file path (created if missing)
+
+    Yields:
+        Parsed state (empty dict if the file is new or unreadable)
+
+    Raises:
+        OSError: If the file cannot be opened, is a symlink or is owned by another user
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+    with os.fdopen(fd, "r+", encoding="utf-8") as fh:
+        if os.fstat(fd).st_uid != os.geteuid():
+            msg = f"State file {path} is owned by another user"
+            raise PermissionError(msg)
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        raw = fh.read()
+        try:
+            state = json.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        if not isinstance(state, dict):
+            state = {}
+        yield state
+        updated = json.dumps(state)
+        if updated != raw:
+            fh.seek(0)
+            fh.truncate()
+            fh.write(updated)
+
+
+def state_file_path(filename: str) -> str:
+    """
+    Return the path of a state file shared between concurrent hook processes.
+
+    STATE_DIR is created with mode 0700 if missing.
+
+    Raises:
+        OSError: If STATE_DIR cannot be created, is a symlink or is owned by another user
+    """
+    os.makedirs(STATE_DIR, mode=0o700, exist_ok=True)
+    st = os.lstat(STATE_DIR)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.geteuid():
+        msg = f"State directory {STATE_DIR} is not a directory owned by the current user"
+        raise PermissionError(msg)
+    return os.path.join(STATE_DIR, filename)
+
+
+def _lookup_nameserver_ips(dns_server: str) -> tuple[str, ...]:
+    """Resolve a DNS server hostname to its IP addresses, raising on failure."""
+    logger.debug(f"Resolving DNS server hostname: {dns_server}")
+    answers = dns.resolver.Resolver().resolve(dns_server, "A")
+    resolved_nameservers = tuple(rdata.address for rdata in answers)
+    if not resolved_nameservers:
+        msg = f"Could not resolve DNS server hostname to an IP address: {dns_server}"
+        raise ValueError(msg)
+    logger.info(f"Resolved DNS server '{dns_server}' to IP(s): {list(resolved_nameservers)}")
+    return resolved_nameservers
+
+
+@functools.lru_cache(maxsize=16)
+def _resolve_nameserver_ips(dns_server: str) -> tuple[str, ...]:
+    """
+    Resolve a DNS server hostname to its IP addresses, cached per process.
+
+    Addresses are also shared with other hook runs through a state file for
+    NAMESERVER_CACHE_TTL seconds. Failed lookups raise and are therefore not cached.
+
+    Args:
+        dns_server: DNS server hostname or IPv4 address
+
+    Returns:
+        Tuple of nameserver IP addresses
+    """
+    try:
+        socket.inet_aton(dns_server)  # Raises OSError if not a valid IP
+        return (dns_server,)
+    except OSError:
+        pass
+
+    # Not an IP: reuse a recent lookup by another hook run, or resolve and share it
+    try:
+        with locked_json_state(state_file_path("dnsexit-ns-cache.json")) as state:
+            entry = state.get(dns_server)
+            if isinstance(entry, dict) and entry.get("ips") and entry.get("expires", 0) > time.time():
+                logger.debug(f"Using cached IP(s) for DNS server '{dns_server}': {entry['ips']}")
+                return tuple(entry["ips"])
+            resolved_nameservers = _lookup_nameserver_ips(dns_server)
+            state[dns_server] = {"ips": list(resolved_nameservers), "expires": time.time() + NAMESERVER_CACHE_TTL}
+            return resolved_nameservers
+    except OSError as e:
+        logger.debug(f"Nameserver cache unavailable: {e}")
+    return _lookup_nameserver_ips(dns_server)
+
+
+@functools.lru_cache(maxsize=16)
+def zone_for_domain(domain: str) -> str:
+    """
+    Return the DNS zone a domain belongs to, used as the API domain for its records.
+
+    Adding, re-adding and deleting a challenge record must all name the same API
+    domain, and records of sibling subdomains share a zone so they can be batched.
+
+    Args:
+        domain: Domain being validated (e.g., www.example.com)
+
+    Returns:
+        Zone name (e.g., example.com), or the domain itself if the lookup fails
+    """
+    try:
+        return dns.resolver.zone_for_name(domain, lifetime=RESOLVER_TIMEOUT).to_text(omit_final_dot=True)
+    except Exception as e:
+        logger.debug(f"Zone lookup failed for {domain}, using it as the API domain: {e}")
+        return domain
+
+
 class DNSExitClient:
     """Client for interacting with DNS Exit API."""
 
@@ -57,8 +219,19 @@ class DNSExitClient:
         """
         self.api_key = api_key
         self.base_url = base_url
+        self._base_params: dict[str, Any] = {"apikey": api_key}
         self.session = requests.Session()
 
+        # Keep the TLS connection to the API alive across add/retry/remove calls
+        retries = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"GET", "POST"}),  # record updates are idempotent (overwrite)
+            raise_on_status=False,  # hand the final response to _make_request for logging
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+
         # Configure SSL/TLS settings for better compatibility
         self.session.verify = True  # Verify SSL certificates
         self.session.headers.update({"Content-Type": "application/json"})
@@ -68,17 +241,21 @@ class DNSExitClient:
         """
         Safely serialize an object to JSON string, handling mock objects and other types.
 
+        Only used for debug output, so nothing is serialized unless DEBUG is enabled.
+
         Args:
             obj: Object to serialize
 
         Returns:
-            JSON string representation (truncated if too long)
+            JSON string representation (truncated if too long), or "" if DEBUG is disabled
         """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return ""
         try:
             # Check if this is a mock object (common in tests)
             # Try JSON first for common containers
             try:
-                serialized = json.dumps(obj, ensure_ascii=False)
+                serialized = dumps_json(obj)
             except Exception:
                 # Fallback to string representation
                 serialized = str(obj)
@@ -103,7 +280,7 @@ class DNSExitClient:
             masked = {}
             for key, value in data.items():
                 # Mask fields that likely contain sensitive data
-                if any(sensitive in key.lower() for sensitive in ["key", "secret", "password", "token", "auth"]):
+                if isinstance(key, str) and SENSITIVE_KEY_RE.search(key):
                     masked[key] = "***MASKED***"
                 else:
                     # Recursively mask nested structures
@@ -131,41 +308,41 @@ class DNSExitClient:
 
         Returns:
             Parsed JSON response or None if error
+
+        Raises:
+            TypeError: If params is not a mapping
         """
         url = base_url or self.base_url
 
-        # Prepare params and ensure API key is present
-        if params is None:
-            request_params: dict[str, Any] = {"apikey": self.api_key}
-        else:
-            try:
-                request_params = dict(params)
-            except Exception:
-                request_params = {}
-            if "apikey" not in request_params:
-                request_params["apikey"] = self.api_key
+        if params is not None and not isinstance(params, Mapping):
+            msg = f"params must be a mapping of query parameters, not {type(params).__name__}"
+            raise TypeError(msg)
+
+        # Prepare params and ensure API key is present (explicit params take precedence)
+        request_params = self._base_params if params is None else {**self._base_params, **params}
 
         # For POST, merge overrides from params to data
         post_params = None
         if method.upper() == "POST" and data is not None:
             # Ensure apikey in data
-            if "apikey" not in data or not data["apikey"]:
+            if not data.get("apikey"):
                 data["apikey"] = self.api_key
             # Merge domain if in params and missing in data
-            if "domain" in request_params and "domain" not in data:
-                data["domain"] = request_params["domain"]
-            # Send params for overrides (apikey/domain)
-            if any(key in request_params for key in ["apikey", "domain"]):
-                post_params = request_params
-
-        logger.debug(f"DNS Exit API Request: {method.upper()} {url}")
-        logger.debug(
-            f"Query Parameters: {self._mask_sensitive_data(request_params if method == 'GET' else post_params)}"
-        )
-        if data is not None:
-            logger.debug(f"Request Body: {self._mask_sensitive_data(self._safe_serialize(data))}")
+            if "domain" in request_params:
+                data.setdefault("domain", request_params["domain"])
+            # Send params for overrides (apikey/domain); apikey is always present
+            post_params = request_params
+
+        # Masking and serialization are only worth doing when the output is emitted
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"DNS Exit API Request: {method.upper()} {url}")
+            logger.debug(
+                f"Query Parameters: {self._mask_sensitive_data(request_params if method == 'GET' else post_params)}"
+            )
+            if data is not None:
+                logger.debug(f"Request Body: {self._safe_serialize(self._mask_sensitive_data(data))}")
 
-        start_time = time.time()
+        start_time = time.monotonic()
         try:
             if method.upper() == "GET":
                 response = self.session.get(url, params=request_params, timeout=REQUEST_TIMEOUT)
@@ -175,22 +352,26 @@ class DNSExitClient:
                 msg = f"Unsupported HTTP method: {method}"
                 raise ValueError(msg)
 
-            duration = time.time() - start_time
+            duration = time.monotonic() - start_time
             status_code = getattr(response, "status_code", "<?>")
             reason = getattr(response, "reason", "")
             logger.info(f"DNS Exit API Response: {status_code} {reason} (Duration: {duration:.2f}s)")
 
-            # Debug headers and brief body info
-            headers_keys = list(getattr(response, "headers", {}).keys()) if hasattr(response, "headers") else []
-            logger.debug(f"Response Headers keys: {headers_keys}")
+            # Debug headers and brief body info; skipped entirely otherwise, since
+            # reading response.text decodes the whole body just to measure it
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                headers_keys = list(getattr(response, "headers", {}).keys())
+                logger.debug(f"Response Headers keys: {headers_keys}")
 
             try:
                 response_data = response.json()
             except ValueError:
                 response_data = None
-                text = getattr(response, "text", "")
-                if text:
-                    logger.debug(f"Response Body length: {len(text)}")
+                if debug_enabled:
+                    text = getattr(response, "text", "")
+                    if text:
+                        logger.debug(f"Response Body length: {len(text)}")
 
             # Raise for HTTP errors after attempting to parse (to log any message)
             try:
@@ -206,7 +387,7 @@ class DNSExitClient:
             return response_data  # may be None
 
         except requests.exceptions.RequestException as e:
-            duration = time.time() - start_time
+            duration = time.monotonic() - start_time
             logger.exception(f"DNS Exit API Request Failed: {type(e).__name__}: {e} (Duration: {duration:.2f}s)")
             resp = getattr(e, "response", None)
             if resp is not None:
@@ -216,7 +397,7 @@ class DNSExitClient:
                     logger.exception(f"Error reading response: {read_error}")
             return None
         except Exception as e:
-            duration = time.time() - start_time
+            duration = time.monotonic() - start_time
             logger.exception(
                 f"Unexpected error in DNS Exit API request: {type(e).__name__}: {e} (Duration: {duration:.2f}s)"
             )
@@ -249,21 +430,26 @@ class DNSExitClient:
             msg = "Invalid domain: must be non-empty string"
             raise ValueError(msg)
 
-        if isinstance(names, str):
-            names = [names]
-            values = [values] if isinstance(values, str) else values
-        if len(names) != len(values):
-            msg = "Names and values must have same length"
-            raise ValueError(msg)
-
-        actions = []
-        for n, v in zip(names, values, strict=False):
-            if not isinstance(n, str) or not isinstance(v, str):
-                msg = "Names and values must be strings"
+        add: dict[str, Any] | list[dict[str, Any]]
+        if isinstance(names, str) and isinstance(values, str):
+            # Single record (the hook path): no intermediate lists
+            add = {"type": "TXT", "name": names, "content": values, "ttl": ttl, "overwrite": overwrite}
+        else:
+            if isinstance(names, str):
+                names = [names]
+            if len(names) != len(values):
+                msg = "Names and values must have same length"
                 raise ValueError(msg)
-            actions.append({"type": "TXT", "name": n, "content": v, "ttl": ttl, "overwrite": overwrite})
 
-        data = {"domain": domain, "add": actions if len(actions) > 1 else actions[0]}
+            actions = []
+            for n, v in zip(names, values, strict=False):
+                if not isinstance(n, str) or not isinstance(v, str):
+                    msg = "Names and values must be strings"
+                    raise ValueError(msg)
+                actions.append({"type": "TXT", "name": n, "content": v, "ttl": ttl, "overwrite": overwrite})
+            add = actions if len(actions) > 1 else actions[0]
+
+        data = {"domain": domain, "add": add}
 
         response = self._make_request("POST", params=params, data=data)
         return bool(response is not None and isinstance(response, dict) and response.get("code") == 0)
@@ -327,35 +513,43 @@ class DNSExitClient:
         response = self._make_request("GET", base_url=ud_url, params=p)
         return bool(response is not None and isinstance(response, dict) and response.get("code") == 0)
 
-    def dns_check_for_txt_record(self, resolver, name: str, value: str) -> bool:
+    async def dns_check_for_txt_record(self, resolver, name: str, value: str) -> bool:
         """
         Check if a TXT record exists with the expected value.
 
         Args:
-            resolver: DNS resolver object
+            resolver: Async DNS resolver object
             name: Record name to check (e.g., _acme-challenge.example.com)
             value: Expected TXT record value
 
         Returns:
             True if record exists with correct value, False otherwise
         """
-        import dns.resolver
+        return bool(await self._query_txt_record(resolver, name, value))
 
+    async def _query_txt_record(self, resolver, name: str, value: str) -> bool | None:
+        """
+        Query a TXT record and tell a definitive answer from a failed query.
+
+        Args:
+            resolver: Async DNS resolver object
+            name: Record name to check
+            value: Expected TXT record value
+
+        Returns:
+            True if the value is served, False if the nameserver answered without it
+            (NXDOMAIN, NoAnswer or other values), None if the query itself failed
+        """
         try:
-            answers = resolver.resolve(name, "TXT")
+            answers = await resolver.resolve(name, "TXT")
 
-            # Iterate through all TXT RDATA and their strings
+            # dnspython represents TXT strings as bytes in rdata.strings; compare
+            # against the encoded value instead of decoding every string
+            expected = value.encode("utf-8")
             for rdata in answers:
-                # dnspython represents TXT strings as bytes in rdata.strings
-                for txt_bytes in getattr(rdata, "strings", []):
-                    try:
-                        txt_value = txt_bytes.decode("utf-8")
-                    except Exception:
-                        # Fallback decoding to be robust
-                        txt_value = txt_bytes.decode("utf-8", errors="ignore")
-                    if txt_value == value:
-                        logger.info(f"DNS record found: {name} TXT = '{value}'")
-                        return True
+                if expected in getattr(rdata, "strings", ()):
+                    logger.info(f"DNS record found: {name} TXT = '{value}'")
+                    return True
 
             # If reached here, records exist but value didn't match
             try:
@@ -376,41 +570,124 @@ class DNSExitClient:
             logger.debug(f"DNS record not found yet: {name} (NoAnswer)")
         except dns.exception.Timeout:
             logger.debug(f"DNS query timeout for: {name}")
+            return None
         except Exception as e:
             logger.debug(f"DNS query error for {name}: {e}")
+            return None
 
         return False
 
-    def _setup_dns_resolver(self, dns_server: str) -> dns.resolver.Resolver | None:
-        """Setup and return configured DNS resolver."""
-        import socket
+    async def _check_txt_record_on_any(
+        self, resolvers: list[dns.asyncresolver.Resolver], name: str, value: str
+    ) -> bool | None:
+        """
+        Query all resolvers concurrently and report the first positive answer.
 
-        import dns.resolver
+        A slow or not yet synchronized nameserver no longer delays detection
+        when another one already serves the expected value.
 
-        resolver = dns.resolver.Resolver()
+        Args:
+            resolvers: Async DNS resolvers, one per nameserver address
+            name: Record name to check (e.g., _acme-challenge.example.com)
+            value: Expected TXT record value
 
-        # Resolve dns_server hostname to IP address if it's not an IP
+        Returns:
+            True if any nameserver returned the expected value, False if every
+            nameserver answered without it, None if any query failed instead
+        """
+        tasks = [asyncio.ensure_future(self._query_txt_record(r, name, value)) for r in resolvers]
         try:
-            socket.inet_aton(dns_server)  # Raises OSError if not a valid IP
-            resolved_nameservers = [dns_server]
-        except OSError:
-            # Not an IP, try to resolve it as a hostname
-            logger.debug(f"Resolving DNS server hostname: {dns_server}")
-            try:
-                answers = resolver.resolve(dns_server, "A")
-                resolved_nameservers = [rdata.address for rdata in answers]
-                if not resolved_nameservers:
-                    logger.exception(f"Could not resolve DNS server hostname to an IP address: {dns_server}")
-                    return None
-                logger.info(f"Resolved DNS server '{dns_server}' to IP(s): {resolved_nameservers}")
-            except Exception as e:
-                logger.exception(f"Failed to resolve DNS server hostname '{dns_server}': {e}")
-                return None
+            definitive = True
+            for next_done in asyncio.as_completed(tasks):
+                found = await next_done
+                if found:
+                    return True
+                if found is None:
+                    definitive = False
+            return False if definitive else None
+        finally:
+            # Don't wait for lagging nameservers once an answer has been found
+            for task in tasks:
+                task.cancel()
+
+    async def _query_soa_serial(self, resolvers: list[dns.asyncresolver.Resolver], domain: str) -> int | None:
+        """
+        Return the zone's SOA serial from whichever resolver answers first.
+
+        Like the TXT fan-out, the slowest nameserver does not hold up the check.
+
+        Args:
+            resolvers: Async DNS resolvers, one per nameserver address
+            domain: Zone name
+
+        Returns:
+            SOA serial, or None if no nameserver returned one (e.g. domain is not a zone apex)
+        """
+        tasks = [asyncio.ensure_future(r.resolve(domain, "SOA")) for r in resolvers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    answers = await next_done
+                    serials: list[int] = [int(rdata.serial) for rdata in answers]
+                except Exception as e:
+                    logger.debug(f"No usable SOA answer for {domain}: {e}")
+                    continue
+                if serials:
+                    return max(serials)
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        resolver.nameservers = resolved_nameservers
-        resolver.timeout = RESOLVER_TIMEOUT
-        resolver.lifetime = RESOLVER_TIMEOUT
-        return resolver
+    async def _poll_txt_record(
+        self, resolvers: list[dns.asyncresolver.Resolver], domain: str, name: str, value: str, last_serial: int | None
+    ) -> tuple[bool | None, int | None]:
+        """
+        Run one propagation check, skipping the TXT query while the zone is unchanged.
+
+        Args:
+            resolvers: Async DNS resolvers, one per nameserver address
+            domain: Zone name
+            name: Record name to check
+            value: Expected TXT record value
+            last_serial: SOA serial seen at the previous definitive negative TXT
+                check, or None to query TXT regardless of the serial
+
+        Returns:
+            (found, serial): found is None if the TXT query was skipped because the
+            SOA serial still equals last_serial; serial is the SOA serial to compare
+            against next time, or None if the TXT query failed rather than answered
+        """
+        serial = await self._query_soa_serial(resolvers, domain)
+        if serial is not None and serial == last_serial:
+            logger.debug(f"Zone serial of {domain} unchanged ({serial}), skipping TXT query")
+            return None, serial
+        found = await self._check_txt_record_on_any(resolvers, name, value)
+        if found is None:
+            # A timeout or server failure says nothing about the record; don't let it
+            # suppress the next TXT query
+            return False, None
+        return found, serial
+
+    def _setup_dns_resolver(self, dns_server: str) -> list[dns.asyncresolver.Resolver] | None:
+        """Setup and return configured async DNS resolvers, one per nameserver address."""
+        try:
+            resolved_nameservers = _resolve_nameserver_ips(dns_server)
+        except Exception as e:
+            logger.exception(f"Failed to resolve DNS server hostname '{dns_server}': {e}")
+            return None
+
+        resolvers = []
+        for nameserver in resolved_nameservers:
+            # Nameservers are set explicitly, so skip parsing the system resolver configuration
+            resolver = dns.asyncresolver.Resolver(configure=False)
+            resolver.nameservers = [nameserver]
+            resolver.timeout = RESOLVER_TIMEOUT
+            resolver.lifetime = RESOLVER_TIMEOUT
+            # Avoid truncated UDP answers (and the TCP retry) when a name holds several TXT values
+            resolver.use_edns(0, 0, EDNS_PAYLOAD_SIZE)
+            resolvers.append(resolver)
+        return resolvers
 
     def wait_for_propagation(
         self,
@@ -425,15 +702,56 @@ class DNSExitClient:
         """
         Wait for DNS record propagation.
 
+        Synchronous wrapper around wait_for_propagation_async(); must not be
+        called from a running event loop.
+
+        Args:
+            domain: Domain name
+            name: Record name (e.g., _acme-challenge.example.com)
+            value: Record value to check for
+            timeout: Maximum time to wait in seconds
+            dns_server: DNS server to use for resolution
+            retry_on_failure: If True, update record on check failure and retry
+            check_interval: Maximum interval between checks
+
+        Returns:
+            True if record propagated, False if timeout
+        """
+        return asyncio.run(
+            self.wait_for_propagation_async(
+                domain,
+                name,
+                value,
+                timeout=timeout,
+                dns_server=dns_server,
+                retry_on_failure=retry_on_failure,
+                check_interval=check_interval,
+            )
+        )
+
+    async def wait_for_propagation_async(
+        self,
+        domain: str,
+        name: str,
+        value: str,
+        *,
+        timeout: int = 300,
+        dns_server: str = "ns10.dnsexit.com",
+        retry_on_failure: bool = False,
+        check_interval: int = 15,
+    ) -> bool:
+        """
+        Wait for DNS record propagation.
+
         Args:
             domain: Domain name
             name: Record name (e.g., _acme-challenge.example.com)
             value: Record value to check for
             timeout: Maximum time to wait in seconds
-            interval: Check interval in seconds (for legacy compatibility, minimum 5 seconds)
             dns_server: DNS server to use for resolution
             retry_on_failure: If True, update record on check failure and retry
-            check_interval: Interval between checks when retry_on_failure=True
+            check_interval: Maximum interval between checks; polling starts at
+                MIN_PROPAGATION_INTERVAL seconds and doubles up to this value
 
         Returns:
             True if record propagated, False if timeout
@@ -451,9 +769,9 @@ class DNSExitClient:
             logger.exception(f"Invalid check_interval value (expected int), got: {check_interval!r}")
             return False
 
-        # Setup DNS resolver
-        resolver = self._setup_dns_resolver(dns_server)
-        if resolver is None:
+        # Setup DNS resolvers
+        resolvers = self._setup_dns_resolver(dns_server)
+        if resolvers is None:
             return False
 
         logger.info(f"Waiting for DNS propagation: {name} TXT record with value '{value[:20]}...'")
@@ -461,26 +779,60 @@ class DNSExitClient:
         if retry_on_failure:
             logger.info("Retry on failure: enabled")
 
-        start_time = time.time()
-
-        while time.time() - start_time < timeout:
-            # Check if DNS record has propagated
-            if self.dns_check_for_txt_record(resolver, name, value):
+        start_time = time.monotonic()
+        interval = MIN_PROPAGATION_INTERVAL
+        last_serial = None  # zone SOA serial at the last definitive negative TXT check
+        last_txt_query = start_time
+        pending_update: asyncio.Task[bool] | None = None
+
+        while time.monotonic() - start_time < timeout:
+            # Join the record update started during the previous interval
+            if pending_update is not None:
+                updated = await pending_update
+                pending_update = None
+                if not updated:
+                    logger.error("Failed to update TXT record")
+                    return False
+                logger.debug("TXT record updated")
+
+            # Check if DNS record has propagated, never past the overall deadline
+            now = time.monotonic()
+            remaining = max(0, timeout - (now - start_time))
+            # Query TXT at least every check_interval even if the serial looks unchanged:
+            # a recursive resolver may serve a cached SOA for its whole TTL
+            skip_serial = last_serial if now - last_txt_query < check_interval else None
+            try:
+                found, serial = await asyncio.wait_for(
+                    self._poll_txt_record(resolvers, domain, name, value, skip_serial), timeout=remaining
+                )
+            except TimeoutError:
+                logger.debug(f"DNS check for {name} did not complete before the propagation deadline")
+                found, serial = False, None
+
+            if found:
                 return True
+            if found is not None:
+                last_serial = serial
+                last_txt_query = now
 
-            if retry_on_failure:
-                # Record not propagated, update it
+            # A skipped check means the zone hasn't reloaded since the last update yet
+            if retry_on_failure and found is not None:
+                # Record not propagated, update it while waiting for the next check
                 logger.warning("DNS propagation check failed, updating TXT record")
-                if not self.add_txt_record(domain, name, value, overwrite=True):
-                    logger.error("Failed to update TXT record")
-                    return False
-                logger.debug("TXT record updated, will recheck after interval")
+                pending_update = asyncio.create_task(
+                    asyncio.to_thread(self.add_txt_record, domain, name, value, overwrite=True)
+                )
             # Wait before next check
-            elapsed_time = time.time() - start_time
-            sleep_time = min(check_interval, max(0, timeout - elapsed_time))
+            elapsed_time = time.monotonic() - start_time
+            sleep_time = min(interval, check_interval, max(0, timeout - elapsed_time))
             if sleep_time > 0:
                 logger.debug(f"Waiting {sleep_time:.1f}s before next DNS check...")
-                time.sleep(sleep_time)
+                await asyncio.sleep(sleep_time)
+            # Records usually show up quickly: start short and back off towards check_interval
+            interval = min(interval * 2, check_interval)
+
+        if pending_update is not None:
+            await pending_update
 
         logger.warning(f"DNS propagation timeout after {timeout}s: {name} TXT record not found")
         return False
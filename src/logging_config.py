@@ -5,16 +5,92 @@ Unified logging configuration for DNS Exit Certbot scripts.
 
 from __future__ import annotations
 
+import atexit
+import copy
+import functools
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
+from json.encoder import encode_basestring as _encode_json_str
+
+import orjson
+
+# None of our formats render thread, process or task fields, so skip collecting
+# them for every LogRecord
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+# logAsyncioTasks (Python 3.12+) is missing from the typeshed logging stubs
+logging.logAsyncioTasks = False  # type: ignore[attr-defined]
 
 # Standardized logging formats
 LOG_FORMAT_STANDARD = "[%(asctime)s] [%(levelname)s] %(message)s"
 LOG_FORMAT_JSON = '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s"}'
 
+# LOG_LEVEL values understood by get_log_level_from_env
+_LEVEL_MAPPING = {
+    "QUIET": logging.ERROR,  # QUIET = only errors and above
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+# Log file write buffer; records are flushed in chunks rather than one write per record
+LOG_FILE_BUFFER_SIZE = 128 * 1024
+
+# LogRecord attributes that are not user-supplied extras
+_RESERVED_LOGRECORD_ATTRS = frozenset(
+    {
+        "name",
+        "msg",
+        "args",
+        "levelname",
+        "levelno",
+        "pathname",
+        "filename",
+        "module",
+        "lineno",
+        "funcName",
+        "created",
+        "msecs",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "processName",
+        "process",
+        "taskName",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+        "message",
+        "asctime",
+        "_cached_msg",
+        "_cached_json",
+    }
+)
+
+# Number of attributes on a LogRecord created without extras
+_BASE_RECORD_ATTR_COUNT = len(logging.LogRecord("", logging.NOTSET, "", 0, "", None, None).__dict__)
+
+# JSON entry for records without extras or exception info; each field but the
+# ASCII-only timestamp is substituted already quoted and escaped
+_PLAIN_ENTRY_TEMPLATE = '{{"timestamp":"{timestamp}","level":{level},"logger":{logger},"message":{message}}}'
+
+
+def dumps_json(obj) -> str:
+    """Serialize obj to a compact JSON string with orjson, or the stdlib for values orjson rejects."""
+    try:
+        return orjson.dumps(obj).decode("utf-8")
+    except TypeError:
+        pass  # e.g. integers wider than 64 bits or non-string dict keys
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
 
 class StructuredFormatter(logging.Formatter):
     """Custom formatter for structured logging."""
@@ -22,50 +98,155 @@ class StructuredFormatter(logging.Formatter):
     def __init__(self, use_json: bool = False):
         super().__init__()
         self.use_json = use_json
+        # (second, ISO prefix) reused for records within the same second; kept as one
+        # tuple so listener threads sharing this formatter never see a mismatched pair
+        self._ts_cache = (-1, "")
+
+    def _format_timestamp(self, record) -> str:
+        """Return the record's local ISO 8601 timestamp with millisecond precision."""
+        sec = int(record.created)
+        cached_sec, prefix = self._ts_cache
+        if sec != cached_sec:
+            prefix = datetime.fromtimestamp(sec).isoformat()
+            self._ts_cache = (sec, prefix)
+        return f"{prefix}.{int(record.msecs):03d}"
 
     def format(self, record):
         if self.use_json:
-            # Create structured JSON log entry
-            log_entry = {
-                "timestamp": datetime.fromtimestamp(record.created).isoformat(),
-                "level": record.levelname,
-                "logger": record.name,
-                "message": record.getMessage(),
-            }
-
-            # Add exception info if present
-            if record.exc_info:
-                log_entry["exception"] = self.formatException(record.exc_info)
-
-            # Add extra fields if present
-            for key, value in record.__dict__.items():
-                if key not in [
-                    "name",
-                    "msg",
-                    "args",
-                    "levelname",
-                    "levelno",
-                    "pathname",
-                    "filename",
-                    "module",
-                    "lineno",
-                    "funcName",
-                    "created",
-                    "msecs",
-                    "relativeCreated",
-                    "thread",
-                    "threadName",
-                    "processName",
-                    "process",
-                    "exc_info",
-                    "exc_text",
-                    "stack_info",
-                ]:
-                    log_entry[key] = value
-
-            return json.dumps(log_entry, ensure_ascii=False)
+            # Every handler sharing this formatter gets the entry rendered once
+            output = getattr(record, "_cached_json", None)
+            if output is None:
+                output = self._format_json(record)
+                record._cached_json = output
+            return output
         return super().format(record)
 
+    def _format_json(self, record) -> str:
+        """Render the record as a single-line JSON entry."""
+        timestamp = self._format_timestamp(record)
+        # Plain records carry exactly the default attributes, so the fixed
+        # four-field entry can be rendered without building a dict
+        plain = not record.exc_info and len(record.__dict__) == _BASE_RECORD_ATTR_COUNT
+
+        # Resolve the message once per record, however many handlers format it
+        message = getattr(record, "_cached_msg", None)
+        if message is None:
+            message = record.getMessage() if record.args else str(record.msg)
+            record._cached_msg = message
+
+        if plain:
+            return _PLAIN_ENTRY_TEMPLATE.format(
+                timestamp=timestamp,
+                level=_encode_json_str(record.levelname),
+                logger=_encode_json_str(record.name),
+                message=_encode_json_str(message),
+            )
+
+        # Create structured JSON log entry
+        log_entry = {
+            "timestamp": timestamp,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": message,
+        }
+
+        # Add exception info if present
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+
+        # Add extra fields if present, in sorted order so the output is stable
+        record_dict = record.__dict__
+        extra_keys = record_dict.keys() - _RESERVED_LOGRECORD_ATTRS
+        if extra_keys:
+            log_entry.update({key: record_dict[key] for key in sorted(extra_keys)})
+
+        return dumps_json(log_entry)
+
+
+class _BufferedFileHandler(logging.FileHandler):
+    """FileHandler that buffers writes and only flushes on errors, when full, or on close."""
+
+    def __init__(self, filename: str, flush_level: int = logging.ERROR):
+        self.flush_level = flush_level
+        super().__init__(filename, encoding="utf-8", delay=True)
+
+    def _open(self):
+        return open(
+            self.baseFilename, self.mode, buffering=LOG_FILE_BUFFER_SIZE, encoding=self.encoding, errors=self.errors
+        )
+
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _ExtrasFilter(logging.Filter):
+    """Logger filter that stamps fixed extra fields onto every record."""
+
+    def __init__(self, extra: dict):
+        super().__init__()
+        self.extra = extra
+
+    def filter(self, record):
+        record.__dict__.update(self.extra)
+        return True
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for an in-process queue that keeps exc_info for the real formatters."""
+
+    def prepare(self, record):
+        # Resolve the message now, since args may be mutated after the call returns,
+        # but leave exception info alone: the record never leaves this process.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+# Log directories already created by setup_logger in this process
+_ENSURED_LOG_DIRS: set[str] = set()
+
+# Background listeners draining each configured logger's queue, keyed by logger name
+_QUEUE_LISTENERS: dict[str, logging.handlers.QueueListener] = {}
+
+# setup_logger options each logger was last configured with, keyed by logger name
+_LOGGER_SIGNATURES: dict[str, tuple] = {}
+
+
+def _stop_queue_listener(name: str) -> None:
+    """Stop the listener for a logger, flushing queued records, and close its handlers."""
+    _LOGGER_SIGNATURES.pop(name, None)
+    listener = _QUEUE_LISTENERS.pop(name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+@atexit.register
+def _stop_all_queue_listeners() -> None:
+    """Flush every queued record before the interpreter exits."""
+    for name in list(_QUEUE_LISTENERS):
+        _stop_queue_listener(name)
+
+
+@functools.lru_cache(maxsize=2)
+def _get_formatter(use_json: bool) -> logging.Formatter:
+    """Return the formatter shared by every logger using the given output mode."""
+    if use_json:
+        return StructuredFormatter(use_json=True)
+    return logging.Formatter(LOG_FORMAT_STANDARD, datefmt="%Y-%m-%d %H:%M:%S")
+
 
 def get_log_level_from_env(default_level: int = logging.INFO) -> int:
     """
@@ -77,21 +258,7 @@ def get_log_level_from_env(default_level: int = logging.INFO) -> int:
     Returns:
         Logging level constant
     """
-    log_level_str = os.environ.get("LOG_LEVEL", "").upper()
-
-    level_mapping = {
-        "QUIET": logging.ERROR,  # QUIET = only errors and above
-        "DEBUG": logging.DEBUG,
-        "INFO": logging.INFO,
-        "WARNING": logging.WARNING,
-        "ERROR": logging.ERROR,
-        "CRITICAL": logging.CRITICAL,
-    }
-
-    if log_level_str in level_mapping:
-        return level_mapping[log_level_str]
-
-    return default_level
+    return _LEVEL_MAPPING.get(os.environ.get("LOG_LEVEL", "").upper(), default_level)
 
 
 def setup_logger(
@@ -122,27 +289,43 @@ def setup_logger(
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Clear any existing handlers
+    # Nothing to rebuild if this logger is still set up with the same options
+    signature = (log_file, level, use_json, operation_id, component)
+    if _LOGGER_SIGNATURES.get(name) == signature and any(
+        isinstance(handler, _LocalQueueHandler) for handler in logger.handlers
+    ):
+        return logger
+
+    # Clear any existing handlers and extras, draining the previous listener first
+    _stop_queue_listener(name)
     logger.handlers.clear()
+    for log_filter in [f for f in logger.filters if isinstance(f, _ExtrasFilter)]:
+        logger.removeFilter(log_filter)
 
-    # Create formatter
-    if use_json:
-        formatter = StructuredFormatter(use_json=True)
-    else:
-        formatter = logging.Formatter(LOG_FORMAT_STANDARD, datefmt="%Y-%m-%d %H:%M:%S")
+    formatter = _get_formatter(use_json)
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers: list[logging.Handler] = [console_handler]
 
     # File handler if log_file is provided
     if log_file:
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        file_handler = logging.FileHandler(log_file)
+        # Ensure directory exists (once per process)
+        log_dir = os.path.dirname(log_file) or "."
+        if log_dir not in _ENSURED_LOG_DIRS:
+            os.makedirs(log_dir, exist_ok=True)
+            _ENSURED_LOG_DIRS.add(log_dir)
+        file_handler = _BufferedFileHandler(log_file)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Log calls only enqueue the record; a background thread does the actual I/O
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _QUEUE_LISTENERS[name] = listener
+    logger.addHandler(_LocalQueueHandler(log_queue))
 
     # Add operation_id and component to logger if provided
     extra = {}
@@ -152,8 +335,9 @@ def setup_logger(
         extra["component"] = component
 
     if extra:
-        logger = logging.LoggerAdapter(logger, extra)
+        logger.addFilter(_ExtrasFilter(extra))
 
+    _LOGGER_SIGNATURES[name] = signature
     return logger
 
 
@@ -204,46 +388,60 @@ def log_exception(logger: logging.Logger, message: str, exit_code: int = 1) -> N
 # Central logger functions (replacement for central_logger.py)
 def log_certbot_start(logger: logging.Logger, domains: str, email: str) -> None:
     """Log certificate process start."""
-    logger.info(f"Starting certificate process for domains: {domains}, email: {email}")
+    logger.info("Starting certificate process for domains: %s, email: %s", domains, email)
 
 
 def log_dns_operation(logger: logging.Logger, operation: str, domain: str, status: str) -> None:
     """Log DNS operation."""
-    logger.info(f"DNS {operation} for {domain}: {status}")
+    logger.info("DNS %s for %s: %s", operation, domain, status)
 
 
 def log_certificate_issued(logger: logging.Logger, domain: str, expiry_date: str) -> None:
     """Log successful certificate issuance."""
-    logger.info(f"Certificate issued for {domain}, expires: {expiry_date}")
+    logger.info("Certificate issued for %s, expires: %s", domain, expiry_date)
 
 
 def log_component_error(logger: logging.Logger, component: str, message: str) -> None:
     """Log error with component identification."""
-    logger.error(f"[{component}] {message}")
+    logger.error("[%s] %s", component, message)
 
 
 def log_component_warning(logger: logging.Logger, component: str, message: str) -> None:
     """Log warning with component identification."""
-    logger.warning(f"[{component}] {message}")
+    logger.warning("[%s] %s", component, message)
 
 
 class LogContext:
     """Context manager for adding structured context to logs."""
 
-    def __init__(self, logger: logging.Logger, **context):
+    def __init__(self, logger: logging.Logger | logging.LoggerAdapter, **context):
         self.logger = logger
         self.context = context
-        self.original_extra = getattr(logger, "extra", {})
+        self._extras_owner = None
+        self._saved_extra = None
+        self._added_filter = None
 
     def __enter__(self):
-        # Add context to logger
-        if hasattr(self.logger, "logger"):
-            # LoggerAdapter case
-            self.logger.logger = logging.LoggerAdapter(
-                self.logger.logger, {**getattr(self.logger.logger, "extra", {}), **self.context}
-            )
+        # Merge the context into the extras already attached to the logger: the
+        # adapter's extra dict, or the filter installed by setup_logger
+        if isinstance(self.logger, logging.LoggerAdapter):
+            owner = self.logger
+        else:
+            owner = next((f for f in self.logger.filters if isinstance(f, _ExtrasFilter)), None)
+
+        if owner is None:
+            self._added_filter = _ExtrasFilter(dict(self.context))
+            self.logger.addFilter(self._added_filter)
+        else:
+            self._extras_owner = owner
+            self._saved_extra = owner.extra
+            owner.extra = {**(owner.extra or {}), **self.context}
         return self.logger
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Remove context (simplified approach)
-        pass
+        if self._added_filter is not None:
+            self.logger.removeFilter(self._added_filter)
+            self._added_filter = None
+        elif self._extras_owner is not None:
+            self._extras_owner.extra = self._saved_extra
+            self._extras_owner = None
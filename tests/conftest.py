@@ -0,0 +1,55 @@
+"""
+Shared fixtures for the certbot hook tests.
+"""
+
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+# Variables the hooks read; cleared before each test so the host environment cannot leak in
+HOOK_ENV_VARS = (
+    "CERTBOT_DOMAIN",
+    "CERTBOT_VALIDATION",
+    "CERTBOT_ALL_DOMAINS",
+    "CERTBOT_REMAINING_CHALLENGES",
+    "DNSEXIT_API_KEY",
+    "DNS_PROPAGATION_WAIT",
+    "DNS_PROPAGATION_CHECK_INTERVAL",
+    "DNS_PROPAGATION_ADDRESS",
+    "DNS_FINALIZATION_WAIT",
+    "LOG_LEVEL",
+)
+
+
+@pytest.fixture
+def set_env(monkeypatch):
+    """Replace the hook environment with the given variables."""
+
+    def _set_env(env):
+        for key in HOOK_ENV_VARS:
+            monkeypatch.delenv(key, raising=False)
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+
+    return _set_env
+
+
+@pytest.fixture
+def hook_process(monkeypatch):
+    """
+    Prepare a hook module's main() to run as its command without touching DNS Exit.
+
+    The returned function takes the hook module name (e.g. "src.auth_hook"), sets
+    argv, resolves every domain to its last two labels instead of querying DNS, and
+    returns the mock that replaces the module's DNSExitClient class.
+    """
+
+    def _hook_process(module):
+        monkeypatch.setattr(sys, "argv", [module.rpartition(".")[2].replace("_", "-")])
+        monkeypatch.setattr(f"{module}.zone_for_domain", lambda domain: ".".join(domain.split(".")[-2:]))
+        client_class = Mock()
+        monkeypatch.setattr(f"{module}.DNSExitClient", client_class)
+        return client_class
+
+    return _hook_process
@@ -5,8 +5,8 @@ Tests for auth_hook.py module.
 
 import os
 import sys
-import unittest
-from unittest.mock import Mock, patch
+
+import pytest
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
@@ -14,184 +14,212 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 from src.auth_hook import main
 
 
-class TestAuthHook(unittest.TestCase):
-    """Test cases for auth_hook.py."""
-
-    def setUp(self):
-        """Set up test fixtures."""
-        self.test_env = {
-            "CERTBOT_DOMAIN": "example.com",
-            "CERTBOT_VALIDATION": "test-validation-string",
-            "DNSEXIT_API_KEY": "test-api-key",
-            "DNS_PROPAGATION_WAIT": "300",
-            "DNS_PROPAGATION_CHECK_INTERVAL": "15",
-            "DNS_PROPAGATION_ADDRESS": "ns12.dnsexit.com",
-            "DNS_FINALIZATION_WAIT": "5",
+@pytest.fixture(scope="module")
+def test_env():
+    """Environment of a regular single-domain auth hook invocation."""
+    return {
+        "CERTBOT_DOMAIN": "example.com",
+        "CERTBOT_VALIDATION": "test-validation-string",
+        "DNSEXIT_API_KEY": "test-api-key",
+        "DNS_PROPAGATION_WAIT": "300",
+        "DNS_PROPAGATION_CHECK_INTERVAL": "15",
+        "DNS_PROPAGATION_ADDRESS": "ns12.dnsexit.com",
+        "DNS_FINALIZATION_WAIT": "5",
+    }
+
+
+@pytest.fixture(autouse=True)
+def mock_client_class(monkeypatch, hook_process):
+    """Run main() as the auth-hook command with record operations that succeed and no real sleeps."""
+    client_class = hook_process("src.auth_hook")
+    client_class.return_value.add_txt_record.return_value = True
+    client_class.return_value.wait_for_propagation.return_value = True
+    monkeypatch.setattr("src.auth_hook.time.sleep", lambda _seconds: None)
+    return client_class
+
+
+@pytest.fixture
+def mock_client(mock_client_class):
+    """The DNSExitClient instance main() creates."""
+    return mock_client_class.return_value
+
+
+def test_missing_domain(set_env):
+    """Test missing CERTBOT_DOMAIN environment variable."""
+    set_env({})
+    assert main() == 1
+
+
+def test_missing_validation(set_env):
+    """Test missing CERTBOT_VALIDATION environment variable."""
+    set_env({"CERTBOT_DOMAIN": "example.com"})
+    assert main() == 1
+
+
+def test_missing_environment_variables(set_env):
+    """Test missing DNSEXIT_API_KEY environment variable."""
+    set_env({"CERTBOT_DOMAIN": "example.com", "CERTBOT_VALIDATION": "test-validation-string"})
+    assert main() == 1
+
+
+def test_auth_hook_success(set_env, test_env, mock_client):
+    """Test successful auth hook execution."""
+    set_env(test_env)
+    assert main() == 0
+
+    # Verify the client was called correctly
+    mock_client.add_txt_record.assert_called_once_with(
+        "example.com", "_acme-challenge.example.com", "test-validation-string"
+    )
+    # Verify wait_for_propagation was called with retry_on_failure=True
+    mock_client.wait_for_propagation.assert_called_once_with(
+        "example.com",
+        "_acme-challenge.example.com",
+        "test-validation-string",
+        timeout=300,
+        dns_server="ns12.dnsexit.com",
+        retry_on_failure=True,
+        check_interval=15,
+    )
+
+
+def test_auth_hook_with_custom_dns_propagation_wait(set_env, test_env, mock_client):
+    """Test auth hook execution with custom DNS propagation wait time."""
+    set_env({**test_env, "DNS_PROPAGATION_WAIT": "90"})  # 90 seconds
+    assert main() == 0
+
+    # Verify the client was called correctly with custom timeout
+    mock_client.add_txt_record.assert_called_once_with(
+        "example.com", "_acme-challenge.example.com", "test-validation-string"
+    )
+    mock_client.wait_for_propagation.assert_called_once_with(
+        "example.com",
+        "_acme-challenge.example.com",
+        "test-validation-string",
+        timeout=90,
+        dns_server="ns12.dnsexit.com",
+        retry_on_failure=True,
+        check_interval=15,
+    )
+
+
+def test_auth_hook_failure(set_env, test_env, mock_client):
+    """Test failed auth hook execution."""
+    mock_client.add_txt_record.return_value = False
+    set_env(test_env)
+    assert main() == 1
+
+
+def test_dns_propagation_timeout(set_env, test_env, mock_client):
+    """Test DNS propagation timeout."""
+    mock_client.wait_for_propagation.return_value = False
+    set_env({**test_env, "DNS_PROPAGATION_WAIT": "5"})  # Short timeout for test
+    assert main() == 1  # Should fail after timeout
+
+    # Verify cleanup was NOT attempted
+    mock_client.remove_txt_record.assert_not_called()
+
+
+def test_records_batched_until_last_challenge(monkeypatch, tmp_path, set_env, test_env, mock_client_class):
+    """Test records are deferred and created in one call on the last challenge."""
+    monkeypatch.setattr("src.dnsexit_client.STATE_DIR", str(tmp_path))
+    env = {**test_env, "CERTBOT_ALL_DOMAINS": "example.com,www.example.com", "CERTBOT_REMAINING_CHALLENGES": "1"}
+
+    set_env(env)
+    assert main() == 0
+    mock_client_class.assert_not_called()
+
+    set_env(
+        {
+            **env,
+            "CERTBOT_DOMAIN": "www.example.com",
+            "CERTBOT_VALIDATION": "www-validation-string",
+            "CERTBOT_REMAINING_CHALLENGES": "0",
         }
-
-    def test_missing_domain(self):
-        """Test missing CERTBOT_DOMAIN environment variable."""
-        with patch.dict(os.environ, {}, clear=True), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 1
-
-    def test_missing_validation(self):
-        """Test missing CERTBOT_VALIDATION environment variable."""
-        env = {"CERTBOT_DOMAIN": "example.com"}
-        with patch.dict(os.environ, env, clear=True), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 1
-
-    def test_missing_environment_variables(self):
-        """Test missing DNSEXIT_API_KEY environment variable."""
-        env = {"CERTBOT_DOMAIN": "example.com", "CERTBOT_VALIDATION": "test-validation-string"}
-        with patch.dict(os.environ, env, clear=True), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 1
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_auth_hook_success(self, mock_client_class):
-        """Test successful auth hook execution."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = True
-        mock_client_class.return_value = mock_client
-
-        with patch.dict(os.environ, self.test_env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 0
-
-        # Verify the client was called correctly
-        mock_client.add_txt_record.assert_called_once_with(
-            "example.com", "_acme-challenge.example.com", "test-validation-string"
-        )
-        # Verify wait_for_propagation was called with retry_on_failure=True
-        mock_client.wait_for_propagation.assert_called_once_with(
-            "example.com",
-            "_acme-challenge.example.com",
-            "test-validation-string",
-            timeout=300,
-            dns_server="ns12.dnsexit.com",
-            retry_on_failure=True,
-            check_interval=15,
-        )
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_auth_hook_with_custom_dns_propagation_wait(self, mock_client_class):
-        """Test auth hook execution with custom DNS propagation wait time."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = True
-        mock_client_class.return_value = mock_client
-
-        env = self.test_env.copy()
-        env["DNS_PROPAGATION_WAIT"] = "90"  # 90 seconds
-
-        with patch.dict(os.environ, env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 0
-
-        # Verify the client was called correctly with custom timeout
-        mock_client.add_txt_record.assert_called_once_with(
-            "example.com", "_acme-challenge.example.com", "test-validation-string"
-        )
-        mock_client.wait_for_propagation.assert_called_once_with(
-            "example.com",
-            "_acme-challenge.example.com",
-            "test-validation-string",
-            timeout=90,
-            dns_server="ns12.dnsexit.com",
-            retry_on_failure=True,
-            check_interval=15,
-        )
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_auth_hook_failure(self, mock_client_class):
-        """Test failed auth hook execution."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = False
-        mock_client_class.return_value = mock_client
-
-        with patch.dict(os.environ, self.test_env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 1
-
-    @patch("src.auth_hook.DNSExitClient")
-    @patch("time.sleep")  # Mock sleep to speed up test
-    def test_dns_propagation_timeout(self, mock_sleep, mock_client_class):
-        """Test DNS propagation timeout."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = False
-        mock_client_class.return_value = mock_client
-
-        env = self.test_env.copy()
-        env["DNS_PROPAGATION_WAIT"] = "5"  # Short timeout for test
-
-        with patch.dict(os.environ, env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 1  # Should fail after timeout
-
-        # Verify cleanup was NOT attempted
-        mock_client.remove_txt_record.assert_not_called()
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_subdomain_handling(self, mock_client_class):
-        """Test subdomain handling."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = True
-        mock_client_class.return_value = mock_client
-
-        env = self.test_env.copy()
-        env["CERTBOT_DOMAIN"] = "sub.example.com"
-
-        with patch.dict(os.environ, env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 0
-
-        # Verify subdomain was handled correctly - now using full domain name
-        mock_client.add_txt_record.assert_called_once_with(
-            "sub.example.com", "_acme-challenge.sub.example.com", "test-validation-string"
-        )
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_wildcard_domain_handling(self, mock_client_class):
-        """Test wildcard domain handling - specific case for *.example.com."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = True
-        mock_client_class.return_value = mock_client
-
-        env = self.test_env.copy()
-        env["CERTBOT_DOMAIN"] = "example.com"  # This comes from *.example.com wildcard
-
-        with patch.dict(os.environ, env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 0
-
-        # Verify wildcard domain was handled correctly
-        # For domain 'example.com', get_domain_parts returns ('', 'example.com')
-        # So txt_name should be '_acme-challenge.example.com'
-        mock_client.add_txt_record.assert_called_once_with(
-            "example.com", "_acme-challenge.example.com", "test-validation-string"
-        )
-
-    @patch("src.auth_hook.DNSExitClient")
-    def test_logging_level_debug(self, mock_client_class):
-        """Test that LOG_LEVEL environment variable is respected."""
-        mock_client = Mock()
-        mock_client.add_txt_record.return_value = True
-        mock_client.wait_for_propagation.return_value = True
-        mock_client_class.return_value = mock_client
-
-        env = self.test_env.copy()
-        env["LOG_LEVEL"] = "DEBUG"
-
-        with patch.dict(os.environ, env), patch("sys.argv", ["auth-hook"]):
-            result = main()
-            assert result == 0
-
-
-if __name__ == "__main__":
-    unittest.main()
+    )
+    assert main() == 0
+
+    mock_client = mock_client_class.return_value
+    mock_client.add_txt_record.assert_called_once_with(
+        "example.com",
+        ["_acme-challenge.example.com", "_acme-challenge.www.example.com"],
+        ["test-validation-string", "www-validation-string"],
+    )
+    assert [c.args[0] for c in mock_client.wait_for_propagation.call_args_list] == ["example.com", "example.com"]
+
+
+def test_aborted_run_records_not_batched(monkeypatch, tmp_path, set_env, test_env, mock_client_class):
+    """Test the first challenge of a run drops records queued by an aborted earlier run."""
+    monkeypatch.setattr("src.dnsexit_client.STATE_DIR", str(tmp_path))
+    env = {**test_env, "CERTBOT_ALL_DOMAINS": "example.com,www.example.com", "CERTBOT_REMAINING_CHALLENGES": "1"}
+
+    # The earlier run queued its first record and was aborted before the last challenge
+    set_env({**env, "CERTBOT_VALIDATION": "stale-validation-string"})
+    assert main() == 0
+
+    set_env(env)
+    assert main() == 0
+    set_env(
+        {
+            **env,
+            "CERTBOT_DOMAIN": "www.example.com",
+            "CERTBOT_VALIDATION": "www-validation-string",
+            "CERTBOT_REMAINING_CHALLENGES": "0",
+        }
+    )
+    assert main() == 0
+
+    mock_client_class.return_value.add_txt_record.assert_called_once_with(
+        "example.com",
+        ["_acme-challenge.example.com", "_acme-challenge.www.example.com"],
+        ["test-validation-string", "www-validation-string"],
+    )
+
+
+def test_sibling_subdomains_batched(monkeypatch, tmp_path, set_env, test_env, mock_client_class):
+    """Test records of sibling subdomains are created in their zone with one call."""
+    monkeypatch.setattr("src.dnsexit_client.STATE_DIR", str(tmp_path))
+    env = {**test_env, "CERTBOT_ALL_DOMAINS": "a.example.com,b.example.com"}
+
+    set_env({**env, "CERTBOT_DOMAIN": "a.example.com", "CERTBOT_REMAINING_CHALLENGES": "1"})
+    assert main() == 0
+    set_env({**env, "CERTBOT_DOMAIN": "b.example.com", "CERTBOT_REMAINING_CHALLENGES": "0"})
+    assert main() == 0
+
+    mock_client_class.return_value.add_txt_record.assert_called_once_with(
+        "example.com",
+        ["_acme-challenge.a.example.com", "_acme-challenge.b.example.com"],
+        ["test-validation-string", "test-validation-string"],
+    )
+
+
+def test_subdomain_handling(set_env, test_env, mock_client):
+    """Test subdomain handling."""
+    set_env({**test_env, "CERTBOT_DOMAIN": "sub.example.com"})
+    assert main() == 0
+
+    # Verify subdomain was handled correctly - now using full domain name
+    # Records are created in the zone, the same API domain cleanup deletes from
+    mock_client.add_txt_record.assert_called_once_with(
+        "example.com", "_acme-challenge.sub.example.com", "test-validation-string"
+    )
+    assert mock_client.wait_for_propagation.call_args.args[0] == "example.com"
+
+
+def test_wildcard_domain_handling(set_env, test_env, mock_client):
+    """Test wildcard domain handling - specific case for *.example.com."""
+    set_env({**test_env, "CERTBOT_DOMAIN": "example.com"})  # This comes from *.example.com wildcard
+    assert main() == 0
+
+    # Verify wildcard domain was handled correctly
+    # For domain 'example.com', get_domain_parts returns ('', 'example.com')
+    # So txt_name should be '_acme-challenge.example.com'
+    mock_client.add_txt_record.assert_called_once_with(
+        "example.com", "_acme-challenge.example.com", "test-validation-string"
+    )
+
+
+def test_logging_level_debug(set_env, test_env):
+    """Test that LOG_LEVEL environment variable is respected."""
+    set_env({**test_env, "LOG_LEVEL": "DEBUG"})
+    assert main() == 0
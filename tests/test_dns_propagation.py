@@ -5,45 +5,94 @@ Behavior-focused tests for DNS propagation functionality in DNSExitClient.
 
 import os
 import sys
+import tempfile
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from src.dnsexit_client import DNSExitClient
+from src.dnsexit_client import DNSExitClient, _resolve_nameserver_ips
+
+
+class _TXT:
+    """Minimal stand-in for a TXT rdata: only the strings attribute is read."""
+
+    __slots__ = ("strings",)
+
+    def __init__(self, strings):
+        self.strings = strings
 
 
 class TestDNSPropagation(unittest.TestCase):
     """Behavior-focused test cases for DNS propagation functionality."""
 
+    domain = "example.com"
+    name = "_acme-challenge.example.com"
+    value = "test-validation-token"
+    value_bytes = value.encode("utf-8")
+    timeout = 10
+    interval = 5
+    dns_server = "8.8.8.8"  # Use IP address to avoid DNS resolution
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the client shared by all tests; it holds no per-test state."""
+        cls.client = DNSExitClient("test-api-key")
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared client's HTTP session."""
+        cls.client.session.close()
+
     def setUp(self):
         """Set up test fixtures."""
-        self.client = DNSExitClient("test-api-key")
-        self.domain = "example.com"
-        self.name = "_acme-challenge.example.com"
-        self.value = "test-validation-token"
-        self.timeout = 10
-        self.interval = 5
-        self.dns_server = "8.8.8.8"  # Use IP address to avoid DNS resolution
-
-    @patch("dns.resolver.Resolver")
+        _resolve_nameserver_ips.cache_clear()
+
+        # Keep shared state files (nameserver cache) out of the real temp directory
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        state_patcher = patch("src.dnsexit_client.STATE_DIR", state_dir.name)
+        state_patcher.start()
+        self.addCleanup(state_patcher.stop)
+
+        # Fake monotonic clock advanced by asyncio.sleep, so waits take no wall-clock time;
+        # wall-clock time.time() stays real for the cross-process state files
+        self.clock = [1000.0]
+        self.sleeps = []
+
+        async def fake_sleep(delay):
+            self.sleeps.append(delay)
+            self.clock[0] += delay
+
+        time_patcher = patch("src.dnsexit_client.time")
+        mock_time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        mock_time.monotonic.side_effect = lambda: self.clock[0]
+        mock_time.time.side_effect = time.time
+        sleep_patcher = patch("src.dnsexit_client.asyncio.sleep", fake_sleep)
+        sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_success(self, mock_resolver_class):
         """Test successful DNS propagation detection."""
         mock_resolver_instance = mock_resolver_class.return_value
-        mock_resolver_instance.resolve.return_value = [MagicMock(strings=[self.value.encode("utf-8")])]
+        mock_resolver_instance.resolve.return_value = [_TXT([self.value_bytes])]
 
         result = self.client.wait_for_propagation(
             self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server=self.dns_server
         )
 
         assert result
+        mock_resolver_instance.use_edns.assert_called_once_with(0, 0, 4096)
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_wrong_value(self, mock_resolver_class):
         """Test propagation fails when TXT value doesn't match."""
         mock_resolver_instance = mock_resolver_class.return_value
-        mock_resolver_instance.resolve.return_value = [MagicMock(strings=[b"different-value"])]
+        mock_resolver_instance.resolve.return_value = [_TXT([b"different-value"])]
 
         result = self.client.wait_for_propagation(
             self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server=self.dns_server
@@ -51,7 +100,7 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_nxdomain(self, mock_resolver_class):
         """Test propagation fails when DNS record doesn't exist."""
         from dns.resolver import NXDOMAIN
@@ -65,7 +114,7 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_no_answer(self, mock_resolver_class):
         """Test propagation fails when DNS server returns no answer."""
         from dns.resolver import NoAnswer
@@ -79,7 +128,7 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_timeout(self, mock_resolver_class):
         """Test propagation timeout behavior."""
         from dns.resolver import NXDOMAIN
@@ -93,13 +142,127 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
+    def test_wait_for_propagation_backs_off_check_interval(self, mock_resolver_class):
+        """Test check interval starts short and doubles up to check_interval."""
+        from dns.resolver import NXDOMAIN
+
+        mock_resolver_instance = mock_resolver_class.return_value
+        mock_resolver_instance.resolve.side_effect = NXDOMAIN()
+
+        result = self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=20, check_interval=5, dns_server=self.dns_server
+        )
+
+        assert not result
+        assert self.sleeps == [1, 2, 4, 5, 5, 3]
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
+    def test_wait_for_propagation_skips_txt_query_while_zone_unchanged(self, mock_resolver_class):
+        """Test TXT is re-queried when the SOA serial advances or check_interval has passed."""
+        from dns.resolver import NXDOMAIN
+
+        serials = iter([7, 7, 8, 8, 8, 8])
+        soa_queries = []
+        txt_queries = []
+
+        def resolve(_qname, rdtype):
+            if rdtype == "SOA":
+                soa_queries.append(self.clock[0])
+                return [MagicMock(serial=next(serials))]
+            txt_queries.append(self.clock[0])
+            raise NXDOMAIN
+
+        mock_resolver_class.return_value.resolve.side_effect = resolve
+
+        result = self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=20, check_interval=5, dns_server=self.dns_server
+        )
+
+        assert not result
+        assert soa_queries == [1000, 1001, 1003, 1007, 1012, 1017]
+        # Skipped at 1001 (serial unchanged) and 1007 (unchanged, last TXT query 4s ago)
+        assert txt_queries == [1000, 1003, 1012, 1017]
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
+    def test_wait_for_propagation_transient_failure_does_not_skip_txt_query(self, mock_resolver_class):
+        """Test a timed out TXT query is retried even though the zone serial is unchanged."""
+        from dns.exception import Timeout
+
+        txt_answers = iter([Timeout(), [_TXT([self.value_bytes])]])
+
+        def resolve(_qname, rdtype):
+            if rdtype == "SOA":
+                return [MagicMock(serial=7)]
+            answer = next(txt_answers)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        mock_resolver_class.return_value.resolve.side_effect = resolve
+
+        result = self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=20, check_interval=5, dns_server=self.dns_server
+        )
+
+        assert result
+        assert self.sleeps == [1]
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
+    def test_wait_for_propagation_retry_updates_record(self, mock_resolver_class):
+        """Test a failed check re-adds the record before the next check."""
+        from dns.resolver import NXDOMAIN
+
+        mock_resolver_instance = mock_resolver_class.return_value
+        mock_resolver_instance.resolve.side_effect = [
+            NXDOMAIN(),  # SOA
+            NXDOMAIN(),  # TXT
+            NXDOMAIN(),  # SOA
+            [_TXT([self.value_bytes])],  # TXT
+        ]
+
+        with patch.object(self.client, "add_txt_record", return_value=True) as mock_add:
+            result = self.client.wait_for_propagation(
+                self.domain,
+                self.name,
+                self.value,
+                timeout=5,
+                check_interval=2,
+                dns_server=self.dns_server,
+                retry_on_failure=True,
+            )
+
+        assert result
+        mock_add.assert_called_once_with(self.domain, self.name, self.value, overwrite=True)
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
+    def test_wait_for_propagation_retry_update_failure(self, mock_resolver_class):
+        """Test propagation stops when re-adding the record fails."""
+        from dns.resolver import NXDOMAIN
+
+        mock_resolver_class.return_value.resolve.side_effect = NXDOMAIN()
+
+        with patch.object(self.client, "add_txt_record", return_value=False) as mock_add:
+            result = self.client.wait_for_propagation(
+                self.domain,
+                self.name,
+                self.value,
+                timeout=5,
+                check_interval=2,
+                dns_server=self.dns_server,
+                retry_on_failure=True,
+            )
+
+        assert not result
+        mock_add.assert_called_once()
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_multiple_txt_records(self, mock_resolver_class):
         """Test propagation succeeds with multiple TXT records."""
         mock_resolver_instance = mock_resolver_class.return_value
         mock_resolver_instance.resolve.return_value = [
-            MagicMock(strings=[b"other-value"]),
-            MagicMock(strings=[self.value.encode("utf-8")]),
+            _TXT([b"other-value"]),
+            _TXT([self.value_bytes]),
         ]
 
         result = self.client.wait_for_propagation(
@@ -108,7 +271,7 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_dns_timeout(self, mock_resolver_class):
         """Test propagation fails on DNS query timeout."""
         from dns.exception import Timeout
@@ -122,7 +285,7 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
-    @patch("dns.resolver.Resolver")
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_general_exception(self, mock_resolver_class):
         """Test propagation fails on general DNS exception."""
         mock_resolver_instance = mock_resolver_class.return_value
@@ -134,28 +297,64 @@ class TestDNSPropagation(unittest.TestCase):
 
         assert not result
 
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     @patch("dns.resolver.Resolver")
-    @patch("dns.resolver.resolve")
-    def test_wait_for_propagation_custom_dns_server_param_hostname(self, mock_resolve, mock_resolver_class):
+    def test_wait_for_propagation_custom_dns_server_param_hostname(self, mock_sync_resolver_class, mock_resolver_class):
         """Test propagation with custom DNS server hostname."""
         mock_resolver_instance = mock_resolver_class.return_value
-        mock_resolver_instance.resolve.return_value = [MagicMock(strings=[self.value.encode("utf-8")])]
+        mock_resolver_instance.resolve.return_value = [_TXT([self.value_bytes])]
 
         # Mock DNS server hostname resolution to return IP address
-        mock_resolve.return_value = [MagicMock(address="192.0.2.10")]
+        mock_sync_resolver_class.return_value.resolve.return_value = [MagicMock(address="192.0.2.10")]
 
         result = self.client.wait_for_propagation(
             self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server="custom.dns.server"
         )
 
         assert result
+        assert mock_resolver_instance.nameservers == ["192.0.2.10"]
 
+        # A second wait on the same server reuses the resolved addresses
+        assert self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server="custom.dns.server"
+        )
+        # ...and so does another hook process, through the shared state file
+        _resolve_nameserver_ips.cache_clear()
+        assert self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server="custom.dns.server"
+        )
+        mock_sync_resolver_class.return_value.resolve.assert_called_once_with("custom.dns.server", "A")
+
+    @patch("dns.asyncresolver.Resolver")
     @patch("dns.resolver.Resolver")
+    def test_wait_for_propagation_any_nameserver_answers(self, mock_sync_resolver_class, mock_resolver_class):
+        """Test propagation succeeds when only one of several nameservers has the record."""
+        from dns.resolver import NXDOMAIN
+
+        mock_sync_resolver_class.return_value.resolve.return_value = [
+            MagicMock(address="192.0.2.10"),
+            MagicMock(address="192.0.2.11"),
+        ]
+        lagging_resolver = MagicMock()
+        lagging_resolver.resolve = AsyncMock(side_effect=NXDOMAIN())
+        synced_resolver = MagicMock()
+        synced_resolver.resolve = AsyncMock(return_value=[_TXT([self.value_bytes])])
+        mock_resolver_class.side_effect = [lagging_resolver, synced_resolver]
+
+        result = self.client.wait_for_propagation(
+            self.domain, self.name, self.value, timeout=5, check_interval=2, dns_server="custom.dns.server"
+        )
+
+        assert result
+        assert lagging_resolver.nameservers == ["192.0.2.10"]
+        assert synced_resolver.nameservers == ["192.0.2.11"]
+
+    @patch("dns.asyncresolver.Resolver", autospec=True)
     def test_wait_for_propagation_unicode_value(self, mock_resolver_class):
         """Test propagation with unicode TXT record values."""
         mock_resolver_instance = mock_resolver_class.return_value
         unicode_value = "test-unicode-значение"
-        mock_resolver_instance.resolve.return_value = [MagicMock(strings=[unicode_value.encode("utf-8")])]
+        mock_resolver_instance.resolve.return_value = [_TXT([unicode_value.encode("utf-8")])]
 
         result = self.client.wait_for_propagation(
             self.domain, self.name, unicode_value, timeout=5, check_interval=2, dns_server=self.dns_server
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for DNSExitClient API requests.
+"""
+
+import logging
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import dns.name
+import dns.resolver
+import pytest
+
+from src.dnsexit_client import (
+    DNSExitClient,
+    configure_logger,
+    locked_json_state,
+    logger,
+    state_file_path,
+    zone_for_domain,
+)
+
+
+class TestDNSExitClientRequests(unittest.TestCase):
+    """Test cases for the requests DNSExitClient sends to the API."""
+
+    def setUp(self):
+        """Set up a client whose HTTP session is mocked."""
+        self.client = DNSExitClient("test-api-key")
+        post_patcher = patch.object(self.client.session, "post")
+        self.mock_post = post_patcher.start()
+        self.addCleanup(post_patcher.stop)
+        self.mock_post.return_value = MagicMock(status_code=200, reason="OK", json=MagicMock(return_value={"code": 0}))
+
+    def test_remove_txt_record(self):
+        """Test remove_txt_record posts a delete action with the API key."""
+        assert self.client.remove_txt_record("example.com", "_acme-challenge.example.com")
+
+        _, kwargs = self.mock_post.call_args
+        assert kwargs["params"] == {"apikey": "test-api-key"}
+        assert kwargs["json"]["domain"] == "example.com"
+        assert kwargs["json"]["delete"] == {"type": "TXT", "name": "_acme-challenge.example.com"}
+
+    def test_remove_txt_record_with_param_overrides(self):
+        """Test query overrides are merged over the base API key parameter."""
+        assert self.client.remove_txt_record("example.com", "_acme-challenge.example.com", {"domain": "example.org"})
+
+        _, kwargs = self.mock_post.call_args
+        assert kwargs["params"] == {"apikey": "test-api-key", "domain": "example.org"}
+
+    def test_make_request_rejects_non_mapping_params(self):
+        """Test a non-mapping params argument fails clearly instead of being merged."""
+        with pytest.raises(TypeError, match="params must be a mapping"):
+            self.client.remove_txt_record("example.com", "_acme-challenge.example.com", "test-validation-string")
+        self.mock_post.assert_not_called()
+
+
+class TestConfigureLogger(unittest.TestCase):
+    """Test cases for routing client log records through the hook logger."""
+
+    def setUp(self):
+        """Restore the client logger's handlers and level after each test."""
+        self.addCleanup(setattr, logger, "handlers", list(logger.handlers))
+        self.addCleanup(logger.setLevel, logger.level)
+
+    def test_client_logs_follow_reconfigured_main_logger(self):
+        """Test client records reach handlers the main logger gets after configure_logger()."""
+        main_logger = logging.getLogger("test_configure_logger_main")
+        main_logger.setLevel(logging.INFO)
+        main_logger.propagate = False
+        self.addCleanup(setattr, main_logger, "handlers", [])
+        main_logger.handlers = [logging.NullHandler()]
+
+        configure_logger(main_logger)
+        configure_logger(main_logger)  # reconfiguring does not duplicate records
+
+        # The main logger is reconfigured, e.g. by setup_logger with other options
+        with self.assertLogs(main_logger, logging.INFO) as captured:
+            logger.info("Record added")
+
+        assert [r.getMessage() for r in captured.records] == ["Record added"]
+
+
+class TestZoneForDomain(unittest.TestCase):
+    """Test cases for the API domain lookup of challenge records."""
+
+    def setUp(self):
+        """Clear cached lookups of other tests."""
+        zone_for_domain.cache_clear()
+        self.addCleanup(zone_for_domain.cache_clear)
+
+    @patch("dns.resolver.zone_for_name")
+    def test_zone_for_domain(self, mock_zone_for_name):
+        """Test a subdomain maps to the zone that contains it."""
+        mock_zone_for_name.return_value = dns.name.from_text("example.com")
+
+        assert zone_for_domain("www.example.com") == "example.com"
+
+    @patch("dns.resolver.zone_for_name")
+    def test_zone_for_domain_lookup_failure(self, mock_zone_for_name):
+        """Test the domain itself is used when the zone cannot be found."""
+        mock_zone_for_name.side_effect = dns.resolver.NoNameservers()
+
+        assert zone_for_domain("www.example.com") == "www.example.com"
+
+
+class TestStateFiles(unittest.TestCase):
+    """Test cases for the state files shared between hook processes."""
+
+    def setUp(self):
+        """Point STATE_DIR at a not yet existing directory."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.state_dir = os.path.join(tmpdir.name, "state")
+        state_patcher = patch("src.dnsexit_client.STATE_DIR", self.state_dir)
+        state_patcher.start()
+        self.addCleanup(state_patcher.stop)
+
+    def test_state_dir_created_private(self):
+        """Test the state directory is created readable by its owner only."""
+        path = state_file_path("state.json")
+        with locked_json_state(path) as state:
+            state["key"] = "value"
+
+        assert Path(self.state_dir).stat().st_mode & 0o777 == 0o700
+        with locked_json_state(path) as state:
+            assert state == {"key": "value"}
+
+    def test_symlinked_state_file_rejected(self):
+        """Test a state file planted as a symlink is not followed."""
+        path = state_file_path("state.json")
+        target = Path(self.state_dir, "target.json")
+        Path(path).symlink_to(target)
+
+        with pytest.raises(OSError, match="symbolic links"), locked_json_state(path):
+            pass
+        assert not target.exists()
+
+    def test_foreign_state_file_rejected(self):
+        """Test a state file owned by another user is not trusted."""
+        path = state_file_path("state.json")
+        with locked_json_state(path):
+            pass
+
+        with (
+            patch("src.dnsexit_client.os.geteuid", return_value=os.geteuid() + 1),
+            pytest.raises(PermissionError, match="owned by another user"),
+            locked_json_state(path),
+        ):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,96 +3,206 @@
 Tests for logging_config.py module.
 """
 
+import json
 import logging
 import os
-import sys
+import tempfile
 import unittest
-from unittest.mock import patch
+from datetime import datetime
 
-# Add src directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
-
-from src.logging_config import get_log_level_from_env, setup_logger
+from src.logging_config import (
+    LogContext,
+    StructuredFormatter,
+    _BufferedFileHandler,
+    _stop_queue_listener,
+    get_log_level_from_env,
+    setup_logger,
+)
 
 
 class TestLoggingConfig(unittest.TestCase):
     """Test cases for logging_config.py."""
 
-    def test_get_log_level_from_env_default(self):
-        """Test get_log_level_from_env with no environment variable set."""
-        with patch.dict(os.environ, {}, clear=True):
-            level = get_log_level_from_env()
-            assert level == logging.INFO
-
-    def test_get_log_level_from_env_debug(self):
-        """Test get_log_level_from_env with DEBUG level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "DEBUG"}):
-            level = get_log_level_from_env()
-            assert level == logging.DEBUG
-
-    def test_get_log_level_from_env_info(self):
-        """Test get_log_level_from_env with INFO level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "INFO"}):
-            level = get_log_level_from_env()
-            assert level == logging.INFO
-
-    def test_get_log_level_from_env_warning(self):
-        """Test get_log_level_from_env with WARNING level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "WARNING"}):
-            level = get_log_level_from_env()
-            assert level == logging.WARNING
-
-    def test_get_log_level_from_env_error(self):
-        """Test get_log_level_from_env with ERROR level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "ERROR"}):
-            level = get_log_level_from_env()
-            assert level == logging.ERROR
-
-    def test_get_log_level_from_env_critical(self):
-        """Test get_log_level_from_env with CRITICAL level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "CRITICAL"}):
-            level = get_log_level_from_env()
-            assert level == logging.CRITICAL
-
-    def test_get_log_level_from_env_case_insensitive(self):
-        """Test get_log_level_from_env is case insensitive."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "debug"}):
-            level = get_log_level_from_env()
-            assert level == logging.DEBUG
-
-        with patch.dict(os.environ, {"LOG_LEVEL": "Debug"}):
-            level = get_log_level_from_env()
-            assert level == logging.DEBUG
-
-    def test_get_log_level_from_env_invalid_level(self):
-        """Test get_log_level_from_env with invalid level falls back to default."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "INVALID"}):
-            level = get_log_level_from_env(logging.WARNING)
-            assert level == logging.WARNING
-
-    def test_get_log_level_from_env_empty_string(self):
-        """Test get_log_level_from_env with empty string falls back to default."""
-        with patch.dict(os.environ, {"LOG_LEVEL": ""}):
-            level = get_log_level_from_env(logging.ERROR)
-            assert level == logging.ERROR
-
-    def test_setup_logger_with_env_level(self):
-        """Test setup_logger uses environment variable for log level."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "DEBUG"}):
-            logger = setup_logger("test_logger")
-            assert logger.level == logging.DEBUG
-
-    def test_setup_logger_with_explicit_level(self):
-        """Test setup_logger uses explicit level parameter over environment."""
-        with patch.dict(os.environ, {"LOG_LEVEL": "ERROR"}):
-            logger = setup_logger("test_logger", level=logging.DEBUG)
-            assert logger.level == logging.DEBUG
-
-    def test_setup_logger_no_env_var(self):
-        """Test setup_logger uses INFO as default when no environment variable."""
-        with patch.dict(os.environ, {}, clear=True):
-            logger = setup_logger("test_logger")
-            assert logger.level == logging.INFO
+    # Level constants bound once on the class for the level tests below
+    _DEBUG, _INFO, _WARNING, _ERROR, _CRITICAL = (
+        logging.DEBUG,
+        logging.INFO,
+        logging.WARNING,
+        logging.ERROR,
+        logging.CRITICAL,
+    )
+
+    # (LOG_LEVEL value, expected level) pairs for get_log_level_from_env
+    LEVEL_CASES = (
+        ("DEBUG", _DEBUG),
+        ("INFO", _INFO),
+        ("WARNING", _WARNING),
+        ("ERROR", _ERROR),
+        ("CRITICAL", _CRITICAL),
+        ("QUIET", _ERROR),
+        ("debug", _DEBUG),
+        ("Debug", _DEBUG),
+    )
+
+    def setUp(self):
+        """Start every test without LOG_LEVEL set and with an empty logger registry."""
+        self._saved_log_level = os.environ.pop("LOG_LEVEL", None)
+        self._saved_manager = logging.Logger.manager
+        logging.Logger.manager = logging.Manager(logging.root)
+
+    def tearDown(self):
+        """Stop the test loggers' listeners and restore LOG_LEVEL and the logger registry."""
+        for name in list(logging.Logger.manager.loggerDict):
+            _stop_queue_listener(name)
+        logging.Logger.manager = self._saved_manager
+
+        os.environ.pop("LOG_LEVEL", None)
+        if self._saved_log_level is not None:
+            os.environ["LOG_LEVEL"] = self._saved_log_level
+
+    def test_get_log_level_from_env_level_mapping(self):
+        """Test get_log_level_from_env maps each level name, case-insensitively."""
+        for value, expected in self.LEVEL_CASES:
+            with self.subTest(LOG_LEVEL=value):
+                os.environ["LOG_LEVEL"] = value
+                assert get_log_level_from_env() == expected
+
+    def test_get_log_level_from_env_fallback(self):
+        """Test get_log_level_from_env falls back to the default when LOG_LEVEL is unset, empty or invalid."""
+        assert get_log_level_from_env() == self._INFO
+        for value, default in (("INVALID", self._WARNING), ("", self._ERROR)):
+            with self.subTest(LOG_LEVEL=value):
+                os.environ["LOG_LEVEL"] = value
+                assert get_log_level_from_env(default) == default
+
+    def test_setup_logger_level(self):
+        """Test setup_logger takes the explicit level, then LOG_LEVEL, then INFO."""
+        for env_level, level, expected in (
+            ("DEBUG", None, self._DEBUG),
+            ("ERROR", self._DEBUG, self._DEBUG),
+            (None, None, self._INFO),
+        ):
+            with self.subTest(LOG_LEVEL=env_level, level=level):
+                os.environ.pop("LOG_LEVEL", None)
+                if env_level is not None:
+                    os.environ["LOG_LEVEL"] = env_level
+                assert setup_logger("test_logger", level=level).level == expected
+
+    def test_setup_logger_reuses_matching_configuration(self):
+        """Test setup_logger keeps existing handlers when called again with the same options."""
+        logger = setup_logger("test_reuse_logger", level=logging.INFO)
+        handlers = list(logger.handlers)
+
+        assert setup_logger("test_reuse_logger", level=logging.INFO).handlers == handlers
+        assert setup_logger("test_reuse_logger", level=logging.DEBUG).handlers != handlers
+
+    def test_setup_logger_operation_context(self):
+        """Test setup_logger attaches operation_id/component to records and drops them on reconfigure."""
+        logger = setup_logger("test_context_logger", level=logging.INFO, operation_id="op-1", component="auth")
+        assert isinstance(logger, logging.Logger)
+        with self.assertLogs(logger, level="INFO") as captured:
+            logger.info("with context")
+        assert captured.records[0].operation_id == "op-1"
+        assert captured.records[0].component == "auth"
+
+        logger = setup_logger("test_context_logger", level=logging.INFO)
+        with self.assertLogs(logger, level="INFO") as captured:
+            logger.info("without context")
+        assert not hasattr(captured.records[0], "operation_id")
+
+    def test_log_context_scopes_extra_fields(self):
+        """Test LogContext adds fields only inside the block, on top of setup_logger's context."""
+        logger = setup_logger("test_log_context_logger", level=logging.INFO, operation_id="op-1")
+        with self.assertLogs(logger, level="INFO") as captured:
+            with LogContext(logger, domain="example.com"):
+                logger.info("inside")
+            logger.info("outside")
+
+        inside, outside = captured.records
+        assert (inside.operation_id, inside.domain) == ("op-1", "example.com")
+        assert outside.operation_id == "op-1"
+        assert not hasattr(outside, "domain")
+
+    def test_structured_formatter_json_output(self):
+        """Test StructuredFormatter renders message, extras and non-ASCII text as JSON."""
+        record = logging.LogRecord("test_logger", logging.INFO, __file__, 1, "Zone %s ready", ("exämple.com",), None)
+        record.operation_id = "op-1"
+
+        formatter = StructuredFormatter(use_json=True)
+        output = formatter.format(record)
+        entry = json.loads(output)
+
+        assert formatter.format(record) == output  # a second handler gets the same entry
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "test_logger"
+        assert entry["message"] == "Zone exämple.com ready"
+        assert entry["operation_id"] == "op-1"
+
+    def test_structured_formatter_json_stdlib_fallback(self):
+        """Test values orjson rejects fall back to equally compact stdlib JSON."""
+        record = logging.LogRecord("test_logger", logging.INFO, __file__, 1, "Zone ready", None, None)
+        record.serial = 2**70  # wider than orjson's 64-bit integers
+
+        output = StructuredFormatter(use_json=True).format(record)
+
+        assert json.loads(output)["serial"] == 2**70
+        assert ", " not in output
+        assert ": " not in output
+
+    def test_structured_formatter_plain_record_escaping(self):
+        """Test records without extras still produce valid JSON for quotes, newlines and non-ASCII."""
+        record = logging.LogRecord("test_logger", logging.WARNING, __file__, 1, 'Value "%s"\nnext line', ("ä",), None)
+
+        entry = json.loads(StructuredFormatter(use_json=True).format(record))
+
+        assert entry["level"] == "WARNING"
+        assert entry["logger"] == "test_logger"
+        assert entry["message"] == 'Value "ä"\nnext line'
+
+    def test_structured_formatter_timestamp(self):
+        """Test StructuredFormatter timestamps stay correct across second boundaries."""
+        formatter = StructuredFormatter(use_json=True)
+        for created in (1700000000.25, 1700000000.5, 1700000001.125):
+            record = logging.LogRecord("test_logger", logging.INFO, __file__, 1, "tick", None, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            expected = datetime.fromtimestamp(created).isoformat(timespec="milliseconds")
+            assert json.loads(formatter.format(record))["timestamp"] == expected
+
+    def test_setup_logger_queued_file_output(self):
+        """Test queued records, including exception info, reach the log file once drained."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "logs", "test.log")
+            logger = setup_logger("test_queued_logger", log_file=log_file, level=logging.INFO, use_json=True)
+            assert not os.path.exists(log_file)  # opened lazily on the first record
+            try:
+                msg = "boom"
+                raise RuntimeError(msg)
+            except RuntimeError:
+                logger.exception("Operation %s failed", "add")
+            _stop_queue_listener("test_queued_logger")
+
+            with open(log_file, encoding="utf-8") as f:
+                entry = json.loads(f.readline())
+
+        assert entry["message"] == "Operation add failed"
+        assert "RuntimeError: boom" in entry["exception"]
+
+    def test_buffered_file_handler_flushes_on_error(self):
+        """Test the file handler holds back routine records until an error is logged."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "test.log")
+            handler = _BufferedFileHandler(log_file)
+            try:
+                handler.emit(logging.LogRecord("test_logger", logging.INFO, __file__, 1, "routine", None, None))
+                with open(log_file, encoding="utf-8") as f:
+                    assert f.read() == ""
+
+                handler.emit(logging.LogRecord("test_logger", logging.ERROR, __file__, 1, "failure", None, None))
+                with open(log_file, encoding="utf-8") as f:
+                    assert f.read().splitlines() == ["routine", "failure"]
+            finally:
+                handler.close()
 
 
 if __name__ == "__main__":